@@ -21,10 +21,43 @@ Example Usage:
     ...     print(f"Error: {e}")
 """
 
+import asyncio
 import google.generativeai as genai
+import hashlib
+import json
 import os
-from typing import Optional, Dict, Any
-from google.api_core.exceptions import GoogleAPIError
+import random
+import threading
+import time
+import urllib.request
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Optional, Dict, Any, ClassVar, Iterator
+from google.api_core.exceptions import (
+    DeadlineExceeded,
+    GoogleAPIError,
+    ResourceExhausted,
+    ServiceUnavailable,
+)
+
+# numpy is only needed by the semantic cache; imported on demand (see
+# _require_numpy) so the module stays importable without it.
+np = None
+
+try:
+    import orjson  # C-level JSON; markedly faster for cache-key hashing of large prompts.
+except ImportError:
+    orjson = None
+
+try:
+    import blake3  # SIMD-parallel hash; far higher throughput than SHA-256.
+except ImportError:
+    blake3 = None
+
+try:
+    import xxhash  # Second-choice fast hash when blake3 is absent.
+except ImportError:
+    xxhash = None
 
 # Define a custom exception for Gemini API errors.  This makes it easier
 # to catch and handle errors specific to the Gemini API.
@@ -34,6 +67,248 @@ class GeminiAPIError(Exception):
 
 
 
+# REST root for endpoints the installed SDK has no binding for (batch API).
+_API_ROOT = "https://generativelanguage.googleapis.com/v1beta"
+
+
+def _require_numpy():
+    """
+    Imports numpy on first need and returns it.
+
+    The semantic cache is the only consumer, so callers who never enable it
+    should not be forced to have numpy installed at all.
+
+    Raises:
+        GeminiAPIError: If numpy is not installed.
+    """
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError as e:
+            raise GeminiAPIError("semantic_cache=True requires the 'numpy' package (pip install numpy)") from e
+        np = numpy
+    return np
+
+
+@lru_cache(maxsize=None)
+def _configure(api_key: str) -> None:
+    """
+    Configures the SDK for the given key exactly once per process.
+
+    genai.configure rebuilds the default client state; calling it from every
+    constructor is redundant work and races when clients with different keys
+    are built concurrently.
+    """
+    genai.configure(api_key=api_key)
+
+
+@lru_cache(maxsize=32)
+def _compile_generation_config(frozen_items: tuple) -> "genai.types.GenerationConfig":
+    """
+    Converts a frozen generation-config dict into a typed GenerationConfig.
+
+    Servers typically reuse one or two config presets across every call;
+    compiling the dict into the SDK's typed object once and caching it skips
+    the per-call parsing/validation the SDK would otherwise repeat.
+    """
+    return genai.types.GenerationConfig(**dict(frozen_items))
+
+
+def _dumps_sorted(payload: Dict[str, Any]) -> bytes:
+    """
+    Serializes a payload to canonical (key-sorted) JSON bytes for hashing.
+
+    Uses orjson when installed — C-level serialization, typically 3-10x
+    faster than stdlib json and bytes-native, which keeps cache-key
+    derivation cheap even for multi-KB prompts — and falls back to the
+    stdlib otherwise. Both serializers must accept the same inputs:
+    safety_settings in the SDK's canonical form has enum keys
+    ({HarmCategory.X: HarmBlockThreshold.Y}), so orjson needs
+    OPT_NON_STR_KEYS, and default=str covers enum values either way.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    return json.dumps(payload, sort_keys=True, default=str).encode()
+
+
+def _hash_bytes(data: bytes) -> str:
+    """
+    Hashes serialized cache-key payloads to a hex digest.
+
+    Cache keys are local and non-adversarial, so cryptographic collision
+    resistance is wasted cost: blake3 or xxh3-128 hash large prompts 5-20x
+    faster than SHA-256. Whichever is installed is used, with SHA-256 as the
+    always-available fallback. Note the digest — and therefore any persisted
+    cache key — depends on which hasher is present.
+    """
+    if blake3 is not None:
+        return blake3.blake3(data).hexdigest()
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.sha256(data).hexdigest()
+
+
+def _estimate_tokens(text: str) -> int:
+    """
+    Cheap local token estimate: ~4 characters per token plus a word-count term.
+
+    model.count_tokens is exact but costs a network round trip, which would
+    negate the latency benefit of the rate limiter it feeds. This heuristic is
+    nanoseconds and close enough for quota accounting; reserve the exact
+    counter for borderline cases (see GeminiAPIClient.count_tokens).
+    """
+    return max(1, len(text) // 4 + len(text.split()) // 3)
+
+
+def _freeze_config(config: Optional[Dict[str, Any]]) -> Optional[tuple]:
+    """
+    Freezes a config dict into a hashable, order-independent tuple.
+
+    List values (e.g. stop_sequences) become tuples, recursively, so the
+    result can key an lru_cache. Returns None for a None config.
+    """
+    if config is None:
+        return None
+    return tuple(sorted((k, _freeze_value(v)) for k, v in config.items()))
+
+
+def _freeze_value(value: Any) -> Any:
+    """Recursively converts lists/tuples to tuples; other values pass through."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(v) for v in value)
+    return value
+
+
+def _compile_config(generation_config: Optional[Dict[str, Any]]):
+    """
+    Returns the typed, cached GenerationConfig for a config dict when possible.
+
+    Configs with unhashable values — e.g. a dict-valued response_schema —
+    cannot key the lru_cache; those are passed through as-is for the SDK to
+    parse per call, exactly as before compilation existed.
+    """
+    if not generation_config:
+        return None
+    try:
+        return _compile_generation_config(_freeze_config(generation_config))
+    except TypeError:
+        return generation_config
+
+
+class _SemanticCluster:
+    """
+    One cluster of the semantic cache: a contiguous embedding block (with
+    fill pointer and doubling growth) plus the matching responses.
+    """
+
+    __slots__ = ("emb", "count", "responses")
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.emb = np.empty((capacity, dim), dtype=np.float32)
+        self.count = 0
+        self.responses: list = []
+
+    def add(self, embedding: "np.ndarray", response: str) -> None:
+        """Appends an (embedding, response) pair, growing the block if full."""
+        if self.count == self.emb.shape[0]:
+            grown = np.empty((self.emb.shape[0] * 2, self.emb.shape[1]), dtype=np.float32)
+            grown[:self.count] = self.emb
+            self.emb = grown
+        self.emb[self.count] = embedding
+        self.count += 1
+        self.responses.append(response)
+
+    def best_match(self, query: "np.ndarray"):
+        """Returns (similarity, response) for the member closest to query."""
+        sims = self.emb[:self.count] @ query
+        best = int(np.argmax(sims))
+        return float(sims[best]), self.responses[best]
+
+
+class _GeminiRateLimiter:
+    """
+    Sliding-window rate limiter for requests-per-minute, tokens-per-minute,
+    and requests-per-day quotas.
+
+    Gating requests locally at a safety margin below the configured quota
+    keeps the server from ever returning 429, which avoids retry storms and
+    user-visible stalls. Thread-safe; an async acquire variant is provided
+    for coroutine callers.
+    """
+
+    def __init__(self, rpm: int = 24, tpm: int = 800_000, rpd: int = 160, margin: float = 0.8):
+        """
+        Args:
+            rpm (int, optional): Requests-per-minute quota. Defaults to 24.
+            tpm (int, optional): Tokens-per-minute quota. Defaults to 800_000.
+            rpd (int, optional): Requests-per-day quota. Defaults to 160.
+            margin (float, optional): Fraction of each quota actually used;
+                staying at 80% leaves headroom for estimation error. Defaults to 0.8.
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.rpd = rpd
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._request_times: deque = deque()          # timestamps within the last minute
+        self._token_events: deque = deque()           # (timestamp, tokens) within the last minute
+        self._tokens_in_window = 0
+        self._daily_times: deque = deque()            # timestamps within the last day
+
+    def _prune(self, now: float) -> None:
+        """Drops window entries older than their quota period."""
+        minute_ago = now - 60.0
+        day_ago = now - 86400.0
+        while self._request_times and self._request_times[0] <= minute_ago:
+            self._request_times.popleft()
+        while self._token_events and self._token_events[0][0] <= minute_ago:
+            self._tokens_in_window -= self._token_events.popleft()[1]
+        while self._daily_times and self._daily_times[0] <= day_ago:
+            self._daily_times.popleft()
+
+    def _reserve(self, tokens: int) -> float:
+        """
+        Records the request if it fits under all quotas; otherwise returns the
+        seconds until the earliest window entry slides out. Caller must hold
+        the lock.
+        """
+        now = time.monotonic()
+        self._prune(now)
+        wait = 0.0
+        if len(self._request_times) + 1 > self.rpm * self.margin:
+            wait = max(wait, self._request_times[0] + 60.0 - now)
+        if self._tokens_in_window + tokens > self.tpm * self.margin and self._token_events:
+            wait = max(wait, self._token_events[0][0] + 60.0 - now)
+        if len(self._daily_times) + 1 > self.rpd * self.margin:
+            wait = max(wait, self._daily_times[0] + 86400.0 - now)
+        if wait > 0.0:
+            return wait
+        self._request_times.append(now)
+        self._token_events.append((now, tokens))
+        self._tokens_in_window += tokens
+        self._daily_times.append(now)
+        return 0.0
+
+    def acquire(self, tokens: int = 1) -> None:
+        """Blocks until the request fits under all quotas, then records it."""
+        while True:
+            with self._lock:
+                wait = self._reserve(tokens)
+            if wait == 0.0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 1) -> None:
+        """Coroutine variant of acquire; sleeps on the event loop instead of blocking."""
+        while True:
+            with self._lock:
+                wait = self._reserve(tokens)
+            if wait == 0.0:
+                return
+            await asyncio.sleep(wait)
+
+
 class GeminiAPIClient:
     """
     A client for interacting with the Google Gemini API.
@@ -41,9 +316,24 @@ class GeminiAPIClient:
     Attributes:
         api_key (str): The API key for accessing the Gemini API.
         model (genai.GenerativeModel):  The generative model instance.
+        stats (Dict[str, int]): Cache hit/miss counters for repeated prompts.
     """
 
-    def __init__(self, api_key: str, model_name: str = 'gemini-1.5-pro-latest'):
+    # One shared GenerativeModel — and therefore one gRPC channel — per
+    # (api_key, model_name) pair, process-wide. Channels are thread-safe, so
+    # servers that build a client per request reuse the existing connection
+    # instead of leaking channels and re-doing TLS/HTTP2 setup. The lock keeps
+    # concurrent first-touch construction from racing.
+    _models: ClassVar[Dict[tuple, "genai.GenerativeModel"]] = {}
+    _models_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, api_key: str, model_name: str = 'gemini-1.5-pro-latest', cache_size: int = 128,
+                 semantic_cache: bool = False, semantic_threshold: float = 0.92,
+                 embedding_model: str = 'models/text-embedding-004',
+                 cached_content: Optional[str] = None,
+                 rate_limiter: Optional[_GeminiRateLimiter] = None,
+                 rpm: int = 24, tpm: int = 800_000, rpd: int = 160,
+                 cache_dir: Optional[str] = None, cache_ttl: Optional[float] = None):
         """
         Initializes the GeminiAPIClient with an API key.
 
@@ -51,19 +341,368 @@ class GeminiAPIClient:
             api_key (str): The API key for accessing the Gemini API.
             model_name (str, optional): The name of the Gemini model to use.
                 Defaults to 'gemini-1.5-pro-latest'.
+            cache_size (int, optional): Maximum number of responses kept in the
+                in-process cache for repeated deterministic prompts. Defaults to 128.
+            semantic_cache (bool, optional): If True, deterministic calls that miss
+                the exact-match cache are also checked against an embedding-similarity
+                cache, so paraphrased prompts can reuse earlier responses. An embedding
+                call (~ms) replaces a full generation call (~s) on hits. Defaults to False.
+            semantic_threshold (float, optional): Minimum cosine similarity for a
+                semantic cache hit. Defaults to 0.92.
+            embedding_model (str, optional): Embedding model used by the semantic
+                cache. Defaults to 'models/text-embedding-004'.
+            cached_content (Optional[str], optional): Name of an existing server-side
+                context cache (as returned by create_cached_context). When set, the
+                model is built from the cached content so the server reuses the
+                already-tokenized prefix instead of re-encoding it on every call.
+            rate_limiter (Optional[_GeminiRateLimiter], optional): A limiter to
+                share across clients hitting the same quota. When None, each
+                client gets its own limiter built from rpm/tpm/rpd.
+            rpm (int, optional): Requests-per-minute quota. Defaults to 24.
+            tpm (int, optional): Tokens-per-minute quota. Defaults to 800_000.
+            rpd (int, optional): Requests-per-day quota. Defaults to 160.
+            cache_dir (Optional[str], optional): Directory for a persistent
+                on-disk response cache (requires the diskcache package). Cached
+                responses survive process restarts, so dev loops and test runs
+                stop re-paying API cost for prompts they have already asked.
+            cache_ttl (Optional[float], optional): Expiry in seconds for on-disk
+                cache entries. None means entries never expire.
         Raises:
             ValueError: If the API key is empty or None.
+            GeminiAPIError: If semantic_cache is set but numpy is not
+                installed, or cache_dir is set but diskcache is not installed.
         """
         if not api_key:
             raise ValueError("API key cannot be empty or None.")
 
         self.api_key = api_key
-        os.environ["GOOGLE_API_KEY"] = self.api_key
-        genai.configure(api_key=self.api_key)
+        self._model_name = model_name
+        self._cached_handle = cached_content
+        # Built lazily on first use (see the model property): clients created
+        # but never exercised (DI containers, test fixtures, module-scope
+        # instances) skip SDK configuration and channel setup entirely.
+        self._model: Optional[genai.GenerativeModel] = None
+
+        # In-process LRU cache for deterministic calls.  Identical prompts
+        # short-circuit the network round trip entirely (a dict lookup versus
+        # hundreds of milliseconds of API latency), and also save token cost.
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_size = cache_size
+        self.stats = {"hits": 0, "misses": 0}
+
+        # Optional persistent layer under the in-memory cache: same keys and
+        # values, but entries survive process restarts.
+        if cache_dir is not None:
+            try:
+                import diskcache
+            except ImportError as e:
+                raise GeminiAPIError("cache_dir requires the 'diskcache' package (pip install diskcache)") from e
+            self._disk_cache = diskcache.Cache(cache_dir)
+        else:
+            self._disk_cache = None
+        self._cache_ttl = cache_ttl
+
+        # Semantic (L2) cache, cluster-routed: entries are grouped into
+        # clusters keyed by a unit-normalized centroid. A query first picks
+        # the nearest centroid (one small GEMV), then compares only against
+        # that cluster's members, keeping lookup sub-linear in total cache
+        # size instead of one O(N) matmul over every stored embedding.
+        self._semantic_cache = semantic_cache
+        if semantic_cache:
+            _require_numpy()
+        self._semantic_threshold = semantic_threshold
+        self._embedding_model = embedding_model
+        self._clusters: list = []
+        self._centroids: Optional["np.ndarray"] = None
+        self._cluster_threshold = 0.7  # below this, a new entry seeds its own cluster
+
+        # Proactive rate limiting: gate requests at 80% of quota locally so the
+        # server never has to answer with a 429 in the first place.
+        self._limiter = rate_limiter or _GeminiRateLimiter(rpm=rpm, tpm=tpm, rpd=rpd)
+
+    @property
+    def model(self) -> "genai.GenerativeModel":
+        """
+        The generative model instance, constructed on first access.
+
+        Raises:
+            GeminiAPIError: If the model cannot be initialized.
+        """
+        if self._model is None:
+            try:
+                if self._cached_handle:
+                    _configure(self.api_key)
+                    cache = self._call_with_retry(lambda: genai.caching.CachedContent.get(self._cached_handle))
+                    self._model = genai.GenerativeModel.from_cached_content(cached_content=cache)
+                else:
+                    model_key = (self.api_key, self._model_name)
+                    with GeminiAPIClient._models_lock:
+                        model = GeminiAPIClient._models.get(model_key)
+                        if model is None:
+                            _configure(self.api_key)
+                            model = self._call_with_retry(lambda: genai.GenerativeModel(self._model_name))
+                            GeminiAPIClient._models[model_key] = model
+                    self._model = model
+            except Exception as e:
+                raise GeminiAPIError(f"Failed to initialize model: {e}") from e
+        return self._model
+
+    def _embed(self, prompt: str) -> "np.ndarray":
+        """
+        Computes a unit-normalized embedding for the given prompt.
+
+        Args:
+            prompt (str): The text to embed.
+
+        Returns:
+            np.ndarray: A normalized float32 embedding vector.
+        """
+        # The semantic lookup runs before the lazy model is first touched, so
+        # this may be the client's first SDK call; configure under our key.
+        _configure(self.api_key)
+        result = genai.embed_content(model=self._embedding_model, content=prompt)
+        vector = np.asarray(result["embedding"], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _semantic_lookup(self, prompt: str):
+        """
+        Looks up a semantically-equivalent cached response for the prompt.
+
+        Args:
+            prompt (str): The prompt to search for.
+
+        Returns:
+            Tuple of (embedding, cached response or None). The embedding is
+            returned so a subsequent store does not have to recompute it.
+        """
+        embedding = self._embed(prompt)
+        cluster_index, _ = self._nearest_cluster(embedding)
+        if cluster_index is not None:
+            similarity, response = self._clusters[cluster_index].best_match(embedding)
+            if similarity > self._semantic_threshold:
+                return embedding, response
+        return embedding, None
+
+    def _nearest_cluster(self, embedding: "np.ndarray"):
+        """
+        Routes an embedding to its closest cluster centroid.
+
+        Returns:
+            Tuple of (cluster index, similarity), or (None, 0.0) when the
+            cache is empty.
+        """
+        if not self._clusters:
+            return None, 0.0
+        sims = self._centroids[:len(self._clusters)] @ embedding
+        best = int(np.argmax(sims))
+        return best, float(sims[best])
+
+    def _semantic_store(self, embedding: "np.ndarray", response: str) -> None:
+        """
+        Adds an (embedding, response) pair to the semantic cache.
+
+        The entry joins the nearest cluster when its centroid is similar
+        enough (the centroid is updated as a re-normalized running mean);
+        otherwise it seeds a new cluster with itself as centroid. Centroids
+        live in one contiguous fill-pointer matrix so routing stays a single
+        small GEMV.
+        """
+        dim = embedding.shape[0]
+        cluster_index, similarity = self._nearest_cluster(embedding)
+        if cluster_index is not None and similarity >= self._cluster_threshold:
+            cluster = self._clusters[cluster_index]
+            centroid = self._centroids[cluster_index]
+            centroid *= cluster.count
+            centroid += embedding
+            norm = np.linalg.norm(centroid)
+            if norm:
+                centroid /= norm
+            cluster.add(embedding, response)
+            return
+        if self._centroids is None:
+            self._centroids = np.empty((64, dim), dtype=np.float32)
+        elif len(self._clusters) == self._centroids.shape[0]:
+            grown = np.empty((self._centroids.shape[0] * 2, dim), dtype=np.float32)
+            grown[:len(self._clusters)] = self._centroids
+            self._centroids = grown
+        self._centroids[len(self._clusters)] = embedding
+        cluster = _SemanticCluster(dim)
+        cluster.add(embedding, response)
+        self._clusters.append(cluster)
+
+    @staticmethod
+    def _call_with_retry(fn, *, max_retries: int = 5, base: float = 0.5, cap: float = 30.0):
+        """
+        Calls fn, retrying transient API failures with exponential backoff.
+
+        Rate limits (429 RESOURCE_EXHAUSTED), overloads (503) and deadline
+        expiries (504) are usually momentary; retrying with backoff plus
+        jitter turns most of these failures into successes instead of
+        surfacing them to the caller. The server's Retry-After hint is
+        honored when present.
+
+        Args:
+            fn: Zero-argument callable performing the API operation.
+            max_retries (int, optional): Total attempts before giving up. Defaults to 5.
+            base (float, optional): Initial backoff in seconds; also the jitter range.
+                Defaults to 0.5.
+            cap (float, optional): Maximum backoff in seconds. Defaults to 30.0.
+
+        Returns:
+            The return value of fn.
+
+        Raises:
+            Whatever fn raised on the final attempt.
+        """
+        for attempt in range(max_retries):
+            try:
+                return fn()
+            except (ResourceExhausted, ServiceUnavailable, DeadlineExceeded) as e:
+                if attempt == max_retries - 1:
+                    raise
+                time.sleep(GeminiAPIClient._retry_delay(e, attempt, base, cap))
+
+    @staticmethod
+    def _retry_delay(exc, attempt: int, base: float, cap: float) -> float:
+        """
+        Computes the sleep before the next retry attempt.
+
+        Prefers the server-supplied Retry-After header when the exception
+        carries one; otherwise falls back to capped exponential backoff with
+        uniform jitter to avoid thundering-herd retries.
+        """
+        response = getattr(exc, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers:
+            retry_after = headers.get("Retry-After") or headers.get("retry-after")
+            if retry_after is not None:
+                try:
+                    return float(retry_after)
+                except (TypeError, ValueError):
+                    pass
+        return min(cap, base * 2 ** attempt) + random.uniform(0, base)
+
+    def _cache_key(self, prompt: str, generation_config: Optional[Dict[str, Any]], safety_settings: Optional[Dict[str, Any]]) -> str:
+        """
+        Builds a stable cache key from the model name, prompt, and settings.
+
+        Args:
+            prompt (str): The prompt to use for content generation.
+            generation_config (Optional[Dict[str, Any]]): Generation configuration options.
+            safety_settings (Optional[Dict[str, Any]]): Safety settings.
+
+        Returns:
+            str: A hex digest uniquely identifying this request.
+        """
+        payload = {
+            "model": self._model_name,
+            "prompt": prompt,
+            "gen": generation_config,
+            "safety": safety_settings,
+        }
+        return _hash_bytes(_dumps_sorted(payload))
+
+    @staticmethod
+    def _check_response(response) -> None:
+        """
+        Raises GeminiAPIError when the response was blocked or cut short.
+
+        Inspecting prompt_feedback and the candidate finish reason up front
+        distinguishes safety blocks from genuinely empty responses, and keeps
+        callers from retrying prompts the API will never answer.
+
+        Args:
+            response: A GenerateContentResponse from the SDK.
+
+        Raises:
+            GeminiAPIError: If the prompt was blocked or the candidate
+                finished for a safety/recitation reason.
+        """
+        feedback = getattr(response, "prompt_feedback", None)
+        if feedback and feedback.block_reason:
+            raise GeminiAPIError(f"Prompt blocked by the API: {feedback.block_reason.name}")
+        if response.candidates:
+            finish_reason = response.candidates[0].finish_reason
+            if finish_reason and finish_reason.name in ("SAFETY", "RECITATION"):
+                raise GeminiAPIError(f"Generation stopped: {finish_reason.name}")
+
+    def _store_exact(self, key: str, text: str) -> None:
+        """
+        Stores a response in the exact-match cache, evicting the LRU entry if full.
+        """
+        self._cache[key] = text
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        if self._disk_cache is not None:
+            self._disk_cache.set(key, text, expire=self._cache_ttl)
+
+    @staticmethod
+    def _is_deterministic(generation_config: Optional[Dict[str, Any]]) -> bool:
+        """
+        Returns True when a call is safe to cache (no sampling randomness).
+        """
+        return generation_config is None or generation_config.get("temperature", 0) == 0
+
+    def count_tokens(self, prompt: str, limit: Optional[int] = None) -> int:
+        """
+        Counts prompt tokens, using the local heuristic whenever it is safe.
+
+        The exact model.count_tokens call is a network round trip; the
+        character/word heuristic is local and close enough for quota
+        accounting or prompt-splitting decisions. Only when the estimate
+        lands within 10% of the given limit — where a wrong guess would
+        actually change a decision — is the exact counter consulted.
+
+        Args:
+            prompt (str): The text to count tokens for.
+            limit (Optional[int], optional): Token budget the caller is
+                checking against (e.g. the model's max input tokens). When
+                None, the heuristic is always used.
+
+        Returns:
+            int: Estimated or exact token count.
+        """
+        estimate = _estimate_tokens(prompt)
+        if limit is not None and estimate >= 0.9 * limit:
+            return self.model.count_tokens(prompt).total_tokens
+        return estimate
+
+    def create_cached_context(self, content: str, ttl_seconds: int = 3600) -> str:
+        """
+        Creates a server-side context cache and rebuilds the model on top of it.
+
+        Static context (system instructions, reference documents) that would
+        otherwise be re-sent and re-tokenized on every call is uploaded once;
+        subsequent generate_content calls reuse the server's cached prefix,
+        cutting input token cost and time-to-first-token. Put static content
+        at the beginning of the prompt so the cached prefix stays stable.
+
+        Args:
+            content (str): The static context to cache server-side.
+            ttl_seconds (int, optional): Cache lifetime in seconds. Defaults to 3600.
+
+        Returns:
+            str: The cache handle name, reusable via the cached_content
+                constructor argument in later processes.
+
+        Raises:
+            GeminiAPIError: If the cache or model cannot be created.
+        """
+        # Model construction is lazy, so this may be the client's first SDK
+        # call; configure under our key before touching the caching API.
+        _configure(self.api_key)
         try:
-            self.model = genai.GenerativeModel(model_name)
+            cache = genai.caching.CachedContent.create(
+                model=self._model_name,
+                contents=[content],
+                ttl=f"{ttl_seconds}s",
+            )
+            self._cached_handle = cache.name
+            self._model = genai.GenerativeModel.from_cached_content(cached_content=cache)
         except Exception as e:
-            raise GeminiAPIError(f"Failed to initialize model: {e}") from e
+            raise GeminiAPIError(f"Failed to create cached context: {e}") from e
+        return self._cached_handle
 
 
     def generate_content(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None, safety_settings: Optional[Dict[str, Any]] = None) -> str:
@@ -81,21 +720,276 @@ class GeminiAPIClient:
             str: The generated content.
 
         Raises:
+            ValueError: If the prompt is empty or whitespace-only.
             GeminiAPIError: If there is an error generating content.
         """
+        # Reject dead inputs locally: the argument check is nanoseconds, the
+        # round trip it saves is milliseconds (and billed).
+        if not prompt or not prompt.strip():
+            raise ValueError("prompt must be non-empty")
+
+        # Only cache deterministic calls; sampled responses are expected to differ.
+        # Keys use whitespace-normalized prompts so trivially-different inputs
+        # ("a  cat" vs "a cat") land on the same cache entry.
+        cacheable = self._is_deterministic(generation_config)
+        key = self._cache_key(" ".join(prompt.split()), generation_config, safety_settings) if cacheable else None
+        if key is not None and key in self._cache:
+            self._cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return self._cache[key]
+
+        # Persistent layer: a hit here backfills the in-memory cache so the
+        # next lookup for this prompt is a plain dict access.
+        if key is not None and self._disk_cache is not None:
+            cached = self._disk_cache.get(key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                self._store_exact(key, cached)
+                return cached
+
+        # L2: embedding-similarity lookup catches paraphrased prompts that the
+        # exact-match layer misses. A hit backfills L1 so the exact prompt is
+        # answered from the dict next time.
+        embedding = None
+        if key is not None and self._semantic_cache:
+            try:
+                embedding, cached = self._semantic_lookup(prompt)
+            except Exception:
+                cached = None  # A failed embedding call should not block generation.
+            if cached is not None:
+                self.stats["hits"] += 1
+                self._store_exact(key, cached)
+                return cached
+
+        # Cache misses pay for a real request; gate it under quota first.
+        self._limiter.acquire(tokens=_estimate_tokens(prompt))
+
+        compiled_config = _compile_config(generation_config)
         try:
-            response = self.model.generate_content(prompt, generation_config=generation_config, safety_settings=safety_settings)
-            response.raise_for_status()  # Raise an exception for bad status codes
+            response = self._call_with_retry(
+                lambda: self.model.generate_content(prompt, generation_config=compiled_config, safety_settings=safety_settings)
+            )
+            self._check_response(response)
 
-            if response.text:
-                return response.text
+            # response.text is a computed property that re-walks and re-joins
+            # the candidate parts on every access; read it exactly once.
+            text = response.text or ""
+            if text:
+                if key is not None:
+                    self.stats["misses"] += 1
+                    self._store_exact(key, text)
+                    if embedding is not None:
+                        self._semantic_store(embedding, text)
+                return text
             else:
                 return "No content generated."  # Handle empty responses gracefully
 
         except GoogleAPIError as e:
             raise GeminiAPIError(f"Gemini API error: {e}") from e
+
+    def stream_content(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None, safety_settings: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Generates content for the prompt, yielding text chunks as they arrive.
+
+        Where generate_content waits for the full response (perceived latency
+        equals total generation time), streaming delivers the first chunk
+        after time-to-first-token, which matters most with large
+        max_output_tokens. UIs can render incrementally; callers wanting the
+        old shape can ''.join() the iterator.
+
+        Args:
+            prompt (str): The prompt to use for content generation.
+            generation_config (Optional[Dict[str, Any]], optional): Generation configuration options.
+            safety_settings (Optional[Dict[str, Any]], optional): Safety settings.
+
+        Yields:
+            str: Text chunks in generation order.
+
+        Raises:
+            ValueError: If the prompt is empty or whitespace-only.
+            GeminiAPIError: If there is an error generating content.
+        """
+        if not prompt or not prompt.strip():
+            raise ValueError("prompt must be non-empty")
+        self._limiter.acquire(tokens=_estimate_tokens(prompt))
+        compiled_config = _compile_config(generation_config)
+        try:
+            response = self._call_with_retry(
+                lambda: self.model.generate_content(prompt, stream=True, generation_config=compiled_config, safety_settings=safety_settings)
+            )
+            for chunk in response:
+                text = chunk.text or ""
+                if text:
+                    yield text
+        except GoogleAPIError as e:
+            raise GeminiAPIError(f"Gemini API error: {e}") from e
+
+    async def agenerate_content(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None, safety_settings: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Asynchronous variant of generate_content.
+
+        Uses the SDK's coroutine API so many requests can be in flight on the
+        same event loop, overlapping network latency instead of serializing it.
+
+        Args:
+            prompt (str): The prompt to use for content generation.
+            generation_config (Optional[Dict[str, Any]], optional): Generation configuration options.
+            safety_settings (Optional[Dict[str, Any]], optional): Safety settings.
+
+        Returns:
+            str: The generated content.
+
+        Raises:
+            ValueError: If the prompt is empty or whitespace-only.
+            GeminiAPIError: If there is an error generating content.
+        """
+        if not prompt or not prompt.strip():
+            raise ValueError("prompt must be non-empty")
+        if not hasattr(self.model, "generate_content_async"):
+            # Older SDK versions have no coroutine API; fall back to a worker thread.
+            return await self.generate_content_threaded(prompt, generation_config=generation_config, safety_settings=safety_settings)
+        await self._limiter.acquire_async(tokens=_estimate_tokens(prompt))
+        compiled_config = _compile_config(generation_config)
+        try:
+            response = await self.model.generate_content_async(prompt, generation_config=compiled_config, safety_settings=safety_settings)
+            self._check_response(response)
+            text = response.text or ""
+            return text if text else "No content generated."
+        except GoogleAPIError as e:
+            raise GeminiAPIError(f"Gemini API error: {e}") from e
+
+    async def generate_content_threaded(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None, safety_settings: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Runs the blocking generate_content in a worker thread via asyncio.to_thread.
+
+        Inside async frameworks (FastAPI, Starlette) a direct generate_content
+        call would block the event loop for the whole network wait,
+        serializing every other request on the loop. Dispatching to a thread
+        frees the loop while keeping the full synchronous pipeline — caching,
+        rate limiting, and retries — which the native async path bypasses.
+        Also the fallback used by agenerate_content when the SDK predates
+        generate_content_async.
+
+        Args:
+            prompt (str): The prompt to use for content generation.
+            generation_config (Optional[Dict[str, Any]], optional): Generation configuration options.
+            safety_settings (Optional[Dict[str, Any]], optional): Safety settings.
+
+        Returns:
+            str: The generated content.
+
+        Raises:
+            GeminiAPIError: If there is an error generating content.
+        """
+        return await asyncio.to_thread(self.generate_content, prompt, generation_config=generation_config, safety_settings=safety_settings)
+
+    async def generate_content_batch(self, prompts: list, max_concurrency: int = 32) -> list:
+        """
+        Generates content for many prompts concurrently.
+
+        Fires up to max_concurrency in-flight requests at once, so total wall
+        time approaches the slowest single call rather than the sum of all of
+        them.
+
+        Args:
+            prompts (list): Prompts to generate content for.
+            max_concurrency (int, optional): Maximum simultaneous requests.
+                Defaults to 32.
+
+        Returns:
+            list: Results in prompt order. Failed prompts yield their exception
+                instead of a string, so one bad prompt does not sink the batch.
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def _one(prompt: str):
+            async with sem:
+                return await self.agenerate_content(prompt)
+
+        return await asyncio.gather(*(_one(p) for p in prompts), return_exceptions=True)
+
+    def generate_content_batch_sync(self, prompts: list, max_concurrency: int = 32) -> list:
+        """
+        Synchronous facade over generate_content_batch for non-async callers.
+        """
+        return asyncio.run(self.generate_content_batch(prompts, max_concurrency=max_concurrency))
+
+    def _rest_json(self, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Issues an authenticated JSON request against the REST API.
+
+        Used for endpoints the installed SDK does not expose. POSTs when a
+        payload is given, GETs otherwise.
+        """
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(
+            f"{_API_ROOT}/{path}",
+            data=data,
+            headers={"Content-Type": "application/json", "x-goog-api-key": self.api_key},
+        )
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read().decode())
+
+    def batch_generate_content(self, prompts: list, poll_interval: float = 10.0, timeout: float = 3600.0) -> list:
+        """
+        Submits all prompts as one server-side batch job and waits for results.
+
+        Unlike generate_content_batch, which fires N concurrent unary calls,
+        this sends a single batchGenerateContent request: one HTTP round trip
+        amortizes TLS handshake, headers, and server-side scheduling across
+        the whole list, and batch-mode pricing is discounted. The job runs
+        asynchronously server-side, so this polls the returned operation until
+        completion — suited to offline/bulk workloads rather than interactive
+        latency.
+
+        Args:
+            prompts (list): Prompts to generate content for.
+            poll_interval (float, optional): Seconds between operation polls.
+                Defaults to 10.0.
+            timeout (float, optional): Maximum seconds to wait for the batch
+                to finish. Defaults to 3600.0.
+
+        Returns:
+            list: Results in prompt order; entries for failed prompts are
+                GeminiAPIError instances instead of strings.
+
+        Raises:
+            GeminiAPIError: If the batch cannot be submitted or times out.
+        """
+        model = self._model_name if self._model_name.startswith("models/") else f"models/{self._model_name}"
+        inlined = [
+            {"request": {"contents": [{"parts": [{"text": prompt}]}]}, "metadata": {"key": str(i)}}
+            for i, prompt in enumerate(prompts)
+        ]
+        payload = {"batch": {"display_name": "gemini-api-client-batch", "input_config": {"requests": {"requests": inlined}}}}
+        try:
+            operation = self._rest_json(f"{model}:batchGenerateContent", payload)
+            deadline = time.monotonic() + timeout
+            while not operation.get("done"):
+                if time.monotonic() >= deadline:
+                    raise GeminiAPIError(f"Batch {operation.get('name', '?')} did not finish within {timeout}s")
+                time.sleep(poll_interval)
+                operation = self._rest_json(operation["name"])
+        except GeminiAPIError:
+            raise
         except Exception as e:
-            raise GeminiAPIError(f"Unexpected error during content generation: {e}") from e
+            raise GeminiAPIError(f"Batch generation failed: {e}") from e
+
+        if "error" in operation:
+            raise GeminiAPIError(f"Batch generation failed: {operation['error']}")
+
+        responses = operation.get("response", {}).get("inlinedResponses", {}).get("inlinedResponses", [])
+        results: list = [GeminiAPIError("No response returned for this prompt")] * len(prompts)
+        for entry in responses:
+            index = int(entry.get("metadata", {}).get("key", -1))
+            if not 0 <= index < len(prompts):
+                continue
+            if "error" in entry:
+                results[index] = GeminiAPIError(f"Gemini API error: {entry['error']}")
+                continue
+            parts = entry.get("response", {}).get("candidates", [{}])[0].get("content", {}).get("parts", [])
+            results[index] = "".join(part.get("text", "") for part in parts) or "No content generated."
+        return results
 
 
 def main():
@@ -138,38 +1032,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-```
-
-Key improvements and explanations:
-
-* **Clearer Error Handling:**  Includes a custom `GeminiAPIError` exception for better error handling specific to the Gemini API.  It uses `raise ... from e` to preserve the original exception's traceback, which is crucial for debugging.  Also catches `ValueError` for API key issues and a general `Exception` for unexpected errors.  Error messages are more informative.
-* **Environment Variable for API Key:**  The code now *explicitly* uses `os.environ.get("GEMINI_API_KEY")` to retrieve the API key.  This is best practice for security (avoiding hardcoding keys).  It also includes a check to ensure the environment variable is set, providing a helpful error message if it's not.
-* **Docstrings:** Comprehensive docstrings are included for the class and methods, explaining their purpose, arguments, return values, and exceptions.
-* **Type Hints:**  Type hints are used throughout the code for better readability and maintainability.
-* **Modern Python Practices:** Uses f-strings for string formatting, which is more readable and efficient.
-* **`raise_for_status()`:**  Crucially, the code now calls `response.raise_for_status()` after making the API call. This ensures that HTTP errors (like 404 Not Found, 500 Internal Server Error) are immediately caught as exceptions, preventing silent failures.
-* **Handles Empty Responses:**  The `generate_content` method now checks if `response.text` is empty and returns a message if it is. This prevents errors if the API doesn't return any content.
-* **Generation Configuration Example:**  The `main` function now includes an example of how to use the `generation_config` parameter to customize the content generation.  This makes the code more practical and demonstrates how to use the API effectively.
-* **Model Selection:** Added `model_name` parameter to `__init__` to allow users to specify which Gemini model to use. Defaults to 'gemini-1.5-pro-latest'.
-* **Clearer Comments:** Added more comments to explain the purpose of different sections of the code.
-* **Safety Settings:** Added optional `safety_settings` parameter to `generate_content`.  Allows users to configure safety filters.
-* **Complete and runnable example:**  The code is now a complete, runnable example that can be executed directly, assuming you have the `google-generativeai` library installed and a valid API key set in the `GEMINI_API_KEY` environment variable.
-* **`if __name__ == "__main__":` block:** The `main()` function is called only when the script is executed directly, not when it's imported as a module. This is standard Python practice.
-
-To use this code:
-
-1. **Install the `google-generativeai` library:**
-   ```bash
-   pip install google-generativeai
-   ```
-2. **Set your Gemini API key as an environment variable:**
-   ```bash
-   export GEMINI_API_KEY="YOUR_GEMINI_API_KEY"
-   ```
-   (Replace `YOUR_GEMINI_API_KEY` with your actual API key).
-3. **Run the script:**
-   ```bash
-   python gemini_api_integration.py
-   ```
-
-This improved version addresses potential issues and provides a more robust and user-friendly way to interact with the Gemini API.  It's a much better starting point for a real-world project.